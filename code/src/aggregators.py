@@ -0,0 +1,49 @@
+# Builtins
+import logging
+
+# Bibliotecas Externas
+import pyarrow as pa
+
+# Módulos Personalizados
+from storage import Storage, S3Storage, PipelinePaths
+
+logger = logging.getLogger(__name__)
+logger.setLevel(logging.INFO)
+formatter = logging.Formatter('%(asctime)s - %(levelname)s - %(message)s')
+
+# Add a console handler
+console_handler = logging.StreamHandler()
+console_handler.setLevel(logging.INFO)
+console_handler.setFormatter(formatter)
+logger.addHandler(console_handler)
+
+class Aggregator():
+    def __init__(self, s3=None, bucket:str=None, storage:Storage=None):
+        self.storage = storage or S3Storage(s3=s3, bucket=bucket)
+        self.city = 'florianopolis'
+        self.type = 'vivareal'
+        self.paths = PipelinePaths(fonte=self.type, cidade=self.city)
+
+    def combine_parquet_files(self, prefix):
+        tables = [
+            self.storage.read_parquet(key)
+            for key in self.storage.list_keys(prefix=prefix)
+            if key.endswith('.parquet')
+        ]
+        return pa.concat_tables(tables)
+
+    def upload_combined_file(self, combined_table, key):
+        self.storage.write_parquet(combined_table, key)
+
+    def run(self, export_method:str='s3'):
+        output_filename = self.paths.curated_file()
+        prefix = self.paths.formatted_folder()
+        combined_table = self.combine_parquet_files(prefix)
+        if export_method == 's3':
+            self.upload_combined_file(combined_table, key=output_filename)
+            return True
+        
+        elif export_method == 'df':
+            return combined_table.to_pandas()
+        else:
+            raise TypeError('Invalid export method, must be one of "s3", "df"')
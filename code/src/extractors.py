@@ -1,20 +1,17 @@
 # Builtins
 from datetime import datetime
+import contextlib
 import time
 import re
-import io
 import logging
-from io import BytesIO
 
 # Bibliotecas Externas
 import bs4 #BeautifulSoup - Lida com estruturas de dados html
-import pyarrow.parquet as pq
 import pyarrow as pa
-import boto3
-import pandas as pd
-import numpy as np
+import pyarrow.csv as pcsv
+import pyarrow.parquet as pq
 # Módulos Personalizados
-from utils import ResultSet
+from storage import Storage, S3Storage, PipelinePaths
 
 logger = logging.getLogger(__name__)
 logger.setLevel(logging.INFO)
@@ -26,9 +23,32 @@ console_handler.setLevel(logging.INFO)
 console_handler.setFormatter(formatter)
 logger.addHandler(console_handler)
 
+# Schema dos anúncios extraídos, utilizado na escrita incremental dos arquivos da camada PROCESSED
+RESULT_SCHEMA = pa.schema([
+    ('data', pa.timestamp('ns')),
+    ('fonte', pa.string()),
+    ('id', pa.int64()),
+    ('descricao', pa.string()),
+    ('tipo', pa.string()),
+    ('endereco', pa.string()),
+    ('rua', pa.string()),
+    ('numero', pa.int64()),
+    ('bairro', pa.string()),
+    ('cidade', pa.string()),
+    ('valor', pa.float64()),
+    ('periodicidade', pa.string()),
+    ('condominio', pa.float64()),
+    ('area', pa.float64()),
+    ('qtd_banheiros', pa.int64()),
+    ('qtd_quartos', pa.int64()),
+    ('qtd_vagas', pa.int64()),
+    ('url', pa.string()),
+    ('amenities', pa.string()),
+])
+
 class Extractor():
 
-    def __init__(self, cidade:str, s3:boto3.client = None) -> None:
+    def __init__(self, cidade:str, s3 = None, bucket:str = None, storage:Storage = None) -> None:
         """
         Instancia um objeto da classe VivaRealApi.
 
@@ -37,12 +57,17 @@ class Extractor():
 
         Args:
             cidade: Uma string representando a cidade a ser monitorada.
-            delay_seconds: Opcional, um número inteiro representando o atraso em segundos entre as requisições sequenciais.
+            s3: Opcional, um cliente boto3 do S3, utilizado quando nenhum storage é informado.
+            bucket: Opcional, o bucket do S3 utilizado em conjunto com o parâmetro s3.
+            storage: Opcional, o armazenamento (S3Storage ou LocalStorage) de onde as páginas são lidas e os resultados gravados.
         """
         self.city = cidade
-        self.result_set = ResultSet()
-        self.s3 = s3
+        self.batch = []
+        self.seen_ids = set()
+        self.writers = []
+        self.storage = storage or S3Storage(s3=s3, bucket=bucket)
         self.type = 'Vivareal'
+        self.paths = PipelinePaths(fonte=self.type, cidade=self.city)
         self.additions_count = 0
     
     def extract_value(self, listing, value_id):
@@ -90,9 +115,8 @@ class Extractor():
         return bs4.BeautifulSoup(html, features="html5lib")
     
     def append_formatted_listing(self, listing:dict=None) -> None:
-        url = listing.get('url')
         """
-        Adiciona o anúncio formatado ao conjunto de resultados.
+        Adiciona o anúncio formatado ao lote atual, que é gravado nos arquivos de saída pelo método flush_batch.
 
         Args:
             listing: Uma lista contendo as informações formatadas do anúncio.
@@ -100,11 +124,47 @@ class Extractor():
         Retorna:
             None
         """
-        try:
-            self.result_set.loc[self.additions_count] = listing
-            self.additions_count += 1
-        except Exception as e:
-            logger.info(f'Error appending the following listing:\n{listing}, {e}')
+        self.batch.append(listing)
+
+    def flush_batch(self, row_group_size:int = None) -> None:
+        """
+        Grava os anúncios do lote atual nos writers abertos em process_folder.
+
+        Se row_group_size for informado, grava apenas row groups completos desse tamanho e mantém
+        o restante no lote; caso contrário grava todo o lote.
+        """
+        size = row_group_size or len(self.batch)
+        while self.batch and len(self.batch) >= size:
+            rows, self.batch = self.batch[:size], self.batch[size:]
+            try:
+                table = pa.Table.from_pylist(rows, schema=RESULT_SCHEMA)
+            except Exception as e:
+                logger.info(f'Error converting {len(rows)} listings, writing them one by one: {e}')
+                table = pa.concat_tables(self.rows_to_tables(rows))
+            for writer in self.writers:
+                writer.write_table(table)
+            self.additions_count += table.num_rows
+
+    def rows_to_tables(self, rows:list) -> list:
+        tables = []
+        for listing in rows:
+            try:
+                tables.append(pa.Table.from_pylist([listing], schema=RESULT_SCHEMA))
+            except Exception as e:
+                logger.info(f'Error appending the following listing:\n{listing}, {e}')
+        return tables or [RESULT_SCHEMA.empty_table()]
+
+    def open_writer(self, stack:contextlib.ExitStack, output_format:str, file_path:str):
+        """
+        Abre um writer incremental (parquet ou csv) para o caminho informado, registrando o fechamento no ExitStack.
+        """
+        sink = stack.enter_context(self.storage.open_output(file_path))
+        if output_format == 'parquet':
+            writer = pq.ParquetWriter(sink, RESULT_SCHEMA)
+        else:
+            writer = pcsv.CSVWriter(sink, RESULT_SCHEMA)
+        stack.callback(writer.close)
+        return writer
         
     
     def process_file(self, file) -> None:
@@ -127,46 +187,66 @@ class Extractor():
         try:
             soup = self.parse_html(html=file)
             listings = self.extract_listings_from_soup(soup=soup)
-            added_listings = set()
+            added_listings = 0
             for i in listings:
                 listing_id = self.extract_value(value_id='id', listing=i)
-                if listing_id not in added_listings:
-                    formatted = self.format_listing(listing = i)
-                    self.append_formatted_listing(listing=formatted)
-                    added_listings.add(listing_id)
+                # Anúncios sem id não podem ser comparados e são sempre mantidos
+                if listing_id is not None:
+                    if listing_id in self.seen_ids:
+                        continue
+                    self.seen_ids.add(listing_id)
+                formatted = self.format_listing(listing = i)
+                self.append_formatted_listing(listing=formatted)
+                added_listings += 1
         except Exception as e:
             logger.info(f'Something went wrong while processing the file: {e}')
         else:
-            logger.info(f'{len(added_listings)} new listings added to result set')
+            logger.info(f'{added_listings} new listings added to result set')
             
 
-    def process_folder(self, bucket_name: str, folder_path: str, filename_pattern:str, output_format: str = None, max_pages : int = None):
+    def process_folder(self, datestr: str, filename_pattern:str, output_format: str = None, max_pages : int = None, row_group_size: int = 1000):
+        """
+        Extrai os anúncios de todas as páginas html de uma pasta da camada RAW e grava na camada PROCESSED.
+
+        Os anúncios são gravados em row groups de tamanho fixo à medida que as páginas são processadas,
+        mantendo em memória apenas o lote atual e o set de ids já extraídos para remover duplicatas entre páginas.
+
+        Args:
+            datestr: A data da pasta da camada RAW cujas páginas html serão processadas.
+            filename_pattern: O padrão para o nome dos arquivos de saída.
+            output_format: 'csv', 'parquet' ou uma lista com ambos (padrão é ['csv', 'parquet']).
+            max_pages: Opcional, o número máximo de páginas a serem processadas.
+            row_group_size: O número de anúncios por row group gravado (padrão é 1000).
+        """
         self.additions_count = 0
-        folder_name = folder_path.split('/')[4]
+        self.batch = []
+        self.seen_ids = set()
+        folder_path = self.paths.raw_folder(datestr)
         if output_format is None:
             output_format = ['csv','parquet']
-        if output_format not in ['csv', 'parquet']:
+        elif isinstance(output_format, str):
+            output_format = [output_format]
+        if not output_format or any(fmt not in ['csv', 'parquet'] for fmt in output_format):
             raise ValueError("Output Format must be one of 'csv', 'parquet'")
-            
-        s3objects = self.s3.list_objects_v2(Bucket=bucket_name, Prefix=folder_path)
-        
-        pages = 1
-        
-        for obj in s3objects.get('Contents', []):
-            file_name = obj['Key']
-            if file_name.endswith('.html'):
-                response = self.s3.get_object(Bucket=bucket_name, Key=file_name)
-                html_content = response['Body'].read().decode('utf-8')
-                self.process_file(html_content)
-                pages += 1
-            if max_pages and (pages > max_pages):
-                break
-        file_path = f'pipeline/processed/{self.type.lower()}/{self.city}/extracted/{filename_pattern}-{folder_name}.{output_format}'
-        table = pa.Table.from_pandas(self.result_set.drop_duplicates())
-        output_buffer = io.BytesIO()
-        pq.write_table(table, output_buffer)
-        output_buffer.seek(0)
-        self.s3.upload_fileobj(output_buffer, bucket_name, file_path)
+
+        with contextlib.ExitStack() as stack:
+            self.writers = [
+                self.open_writer(stack, fmt, self.paths.processed_file(datestr=datestr, filename_pattern=filename_pattern, output_format=fmt))
+                for fmt in output_format
+            ]
+            pages = 1
+
+            for file_name in self.storage.list_keys(prefix=folder_path):
+                if file_name.endswith('.html'):
+                    html_content = self.storage.read_text(file_name)
+                    self.process_file(html_content)
+                    self.flush_batch(row_group_size=row_group_size)
+                    pages += 1
+                if max_pages and (pages > max_pages):
+                    break
+            self.flush_batch()
+        self.writers = []
+        logger.info(f'{self.additions_count} listings written to {datestr} ({", ".join(output_format)})')
 
     @property
     def endpoint(self) -> str:
@@ -246,68 +326,3 @@ class Extractor():
             'amenities': lambda x: '; '.join(tag.text.strip() for tag in x.find_all('li', {'class': 'amenities__item'}))
         }
         return cases.get(value_id)
-    
-class Formatter():
-    def __init__(self, s3:boto3.client = None) -> None:
-        self.s3 = s3
-        self.type = 'vivareal' # variável fixada momentaneamente, no futuro alterar para ser passada na instanciação da classe
-        self.city = 'florianopolis' # variável fixada momentaneamente, no futuro alterar para ser passada na instanciação da classe
-    
-    def format_df(self, dataframe=pd.DataFrame) -> pd.DataFrame:
-        df = dataframe
-        
-        # A lista de tipos de imóveis abaixo define os tipos tidos como comerciais, para segmentar com maior facilidade o dataset.
-        commercial_values = ['loja', 'ponto', 'box', 'conjunto', 'comercial', 'galpão', 'prédio', 'edifício', 'terreno']
-        try:
-            df['categoria'] = np.where(df['tipo'].str.lower().isin(commercial_values), 'Comercial', 'Residencial')
-            
-            df['condominio'] = df['condominio'].fillna(0)
-
-            # A coluna de valor total soma o valor do condomínio com o valor do aluguel nos casos em que o aluguel é mensal.
-            df['valor_total'] = pd.to_numeric(df.apply(lambda row: row['valor'] + row['condominio'] if not pd.isnull(row['valor']) and not pd.isnull(row['condominio']) else row['valor'], axis=1).fillna(0))
-            
-            # Estes valores calculados servem tanto para a análise dos dados como para a identificação de outliers
-            df['valor_m2'] = (df['valor'] / df['area']) / 30 if df['periodicidade'].str == 'Mês' else df['valor'] / df['area']
-            df['valor_condo_m2'] = (df['condominio'] / df['area']) / 30 if df['periodicidade'].str == 'Mês' else df['condominio'] / df['area']
-            
-            # Se o tipo da coluna area não for reforçado como float pode acabar sendo definido automaticamente como int em edge cases em que todos os valores estão presentes.
-            df['area'] = df['area'].astype(float) 
-            
-            # As condições abaixo tratam outliers, como erros de digitação em que os valores são exorbitantes e é impossível determinar um tratamento único adequado para todos os casos.
-            formatted_df = df[(df['valor_m2'] < 500) &
-                              (df['valor_m2'] >= 1) &
-                              (df['area'] <= 2000) &
-                              (df['valor_condo_m2'] <= 40) &
-                              ((df['periodicidade'] == 'Dia')|(df['periodicidade'] == 'Mês'))]
-        except Exception as e:
-            logger.info(f'Error formatting file: {e}')
-        finally:
-            return formatted_df
-    
-    def parse_parquet_response(self, s3object=None) -> pd.DataFrame:
-        obj = s3object['Body'].read()
-        buffer = BytesIO(obj)
-        parquet_table = pq.read_table(buffer)
-        return parquet_table.to_pandas()
-    
-    def process_date(self, bucket_name: str, datestr: str):
-        file_name = f'pipeline/processed/{self.type.lower()}/{self.city}/extracted/processed-{datestr}.parquet'
-        logger.info(f'getting object from s3 on {file_name}')
-        obj = self.s3.get_object(Bucket=bucket_name, Key=file_name)
-        if not file_name.endswith('.parquet'):
-            raise ValueError("Invalid file format")
-        df = self.parse_parquet_response(s3object=obj)
-        formatted_df = self.format_df(dataframe=df)
-        file_path = f'pipeline/processed/{self.type.lower()}/{self.city}/formatted/formatted-{datestr}.parquet'
-        table = pa.Table.from_pandas(formatted_df)
-        output_buffer = io.BytesIO()
-        pq.write_table(table, output_buffer)
-        output_buffer.seek(0)
-        self.s3.upload_fileobj(output_buffer, bucket_name, file_path)
-        
-    def run(self, datestr=str, reprocess=False, bucket_name=str):
-        # sourcery skip: remove-pass-body
-        if reprocess == True:
-            pass #implementar aqui caso para reprocessar toda a pasta de arquivos.
-        else:
-            self.process_date(datestr=datestr, bucket_name=bucket_name)
\ No newline at end of file
@@ -0,0 +1,79 @@
+# Builtins
+import logging
+
+# Bibliotecas Externas
+import pyarrow as pa
+import pandas as pd
+import numpy as np
+
+# Módulos Personalizados
+from storage import Storage, S3Storage, PipelinePaths
+
+logger = logging.getLogger(__name__)
+logger.setLevel(logging.INFO)
+formatter = logging.Formatter('%(asctime)s - %(levelname)s - %(message)s')
+
+# Add a console handler
+console_handler = logging.StreamHandler()
+console_handler.setLevel(logging.INFO)
+console_handler.setFormatter(formatter)
+logger.addHandler(console_handler)
+
+class Formatter():
+    def __init__(self, s3 = None, bucket:str = None, storage:Storage = None) -> None:
+        self.storage = storage or S3Storage(s3=s3, bucket=bucket)
+        self.type = 'vivareal' # variável fixada momentaneamente, no futuro alterar para ser passada na instanciação da classe
+        self.city = 'florianopolis' # variável fixada momentaneamente, no futuro alterar para ser passada na instanciação da classe
+        self.paths = PipelinePaths(fonte=self.type, cidade=self.city)
+    
+    def format_df(self, dataframe=pd.DataFrame) -> pd.DataFrame:
+        df = dataframe
+        
+        # A lista de tipos de imóveis abaixo define os tipos tidos como comerciais, para segmentar com maior facilidade o dataset.
+        commercial_values = ['loja', 'ponto', 'box', 'conjunto', 'comercial', 'galpão', 'prédio', 'edifício', 'terreno']
+        try:
+            df['categoria'] = np.where(df['tipo'].str.lower().isin(commercial_values), 'Comercial', 'Residencial')
+            
+            df['condominio'] = df['condominio'].fillna(0)
+
+            # A coluna de valor total soma o valor do condomínio com o valor do aluguel nos casos em que o aluguel é mensal.
+            df['valor_total'] = pd.to_numeric(df.apply(lambda row: row['valor'] + row['condominio'] if not pd.isnull(row['valor']) and not pd.isnull(row['condominio']) else row['valor'], axis=1).fillna(0))
+            
+            # Estes valores calculados servem tanto para a análise dos dados como para a identificação de outliers
+            df['valor_m2'] = (df['valor'] / df['area']) / 30 if df['periodicidade'].str == 'Mês' else df['valor'] / df['area']
+            df['valor_condo_m2'] = (df['condominio'] / df['area']) / 30 if df['periodicidade'].str == 'Mês' else df['condominio'] / df['area']
+            
+            # Se o tipo da coluna area não for reforçado como float pode acabar sendo definido automaticamente como int em edge cases em que todos os valores estão presentes.
+            df['area'] = df['area'].astype(float) 
+            
+            # As condições abaixo tratam outliers, como erros de digitação em que os valores são exorbitantes e é impossível determinar um tratamento único adequado para todos os casos.
+            formatted_df = df[(df['valor_m2'] < 500) &
+                              (df['valor_m2'] >= 1) &
+                              (df['area'] <= 2000) &
+                              (df['valor_condo_m2'] <= 40) &
+                              ((df['periodicidade'] == 'Dia')|(df['periodicidade'] == 'Mês'))]
+        except Exception as e:
+            logger.info(f'Error formatting file: {e}')
+        finally:
+            return formatted_df
+    
+    def read_parquet(self, file_name:str) -> pd.DataFrame:
+        if not file_name.endswith('.parquet'):
+            raise ValueError("Invalid file format")
+        return self.storage.read_parquet(file_name).to_pandas()
+    
+    def process_date(self, datestr: str):
+        file_name = self.paths.processed_file(datestr=datestr)
+        logger.info(f'getting object from storage on {file_name}')
+        df = self.read_parquet(file_name)
+        formatted_df = self.format_df(dataframe=df)
+        file_path = self.paths.formatted_file(datestr=datestr)
+        table = pa.Table.from_pandas(formatted_df)
+        self.storage.write_parquet(table, file_path)
+        
+    def run(self, datestr=str, reprocess=False):
+        # sourcery skip: remove-pass-body
+        if reprocess == True:
+            pass #implementar aqui caso para reprocessar toda a pasta de arquivos.
+        else:
+            self.process_date(datestr=datestr)
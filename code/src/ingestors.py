@@ -1,18 +1,18 @@
 # Builtins
 from datetime import datetime
 import time
-import io
+import re
 import logging
 
 # Bibliotecas Externas
-import bs4 #BeautifulSoup - Lida com estruturas de dados html
 import contextlib
 
 from selenium import webdriver
 from selenium.common.exceptions import NoSuchElementException
 from selenium.webdriver.common.by import By
-import boto3
-import contextlib
+
+# Módulos Personalizados
+from storage import Storage, S3Storage, PipelinePaths
 
 logger = logging.getLogger(__name__)
 logger.setLevel(logging.INFO)
@@ -24,15 +24,21 @@ console_handler.setLevel(logging.INFO)
 console_handler.setFormatter(formatter)
 logger.addHandler(console_handler)
 
+# Links dos cards de anúncio, utilizados para obter os ids sem precisar analisar todo o html com o bs4
+CARD_LINK_PATTERN = re.compile(r'<a\b[^>]*class="property-card__content-link js-card-title"[^>]*>')
+HREF_PATTERN = re.compile(r'href="([^"]*)"')
+
 class Ingestor():
 
-    def __init__(self, cidade:str, estado:str, bucket:str, webdriver:webdriver = None, s3:boto3.client = None) -> None:
+    def __init__(self, cidade:str, estado:str, bucket:str = None, webdriver:webdriver = None, s3 = None, storage:Storage = None) -> None:
         self.city = cidade
         self.state = estado
-        self.s3 = s3
-        self.bucket = bucket
+        self.storage = storage or S3Storage(s3=s3, bucket=bucket)
         self.webdriver = webdriver
         self.type = 'Vivareal'
+        self.paths = PipelinePaths(fonte=self.type, cidade=self.city)
+        self.seen_ids = set()
+        self.stats = {}
         
 
     @property
@@ -47,8 +53,29 @@ class Ingestor():
         state = self.state.strip().lower()
         return f'https://www.vivareal.com.br/aluguel/{state}/{city}/'
     
+    def parse_listing_ids(self, html:str) -> set:
+        """
+        Obtém os ids dos anúncios de uma página a partir dos links dos cards.
+
+        O id é obtido da mesma forma que no extrator 'id' da classe Extractor, pelos dígitos
+        do último trecho da url do anúncio.
 
-    def ingest_pages(self, filename_pattern: str, all: bool = True, max_pages: int = None, delay_seconds: int = 0) -> None:
+        Args:
+            html: O conteúdo html da página.
+
+        Retorna:
+            Um set com os ids inteiros dos anúncios da página.
+        """
+        ids = set()
+        for tag in CARD_LINK_PATTERN.findall(html):
+            href = HREF_PATTERN.search(tag)
+            digits = ''.join(re.findall(r'\d', href.group(1).split('-')[-1])) if href else ''
+            if digits:
+                ids.add(int(digits))
+        return ids
+
+
+    def ingest_pages(self, filename_pattern: str, all: bool = True, max_pages: int = None, delay_seconds: int = 0, max_stale_pages: int = 3, datestr: str = None) -> None:
         """
         Ingere várias páginas de dados da API e salva o conteúdo HTML em arquivos na camada RAW.
 
@@ -57,6 +84,9 @@ class Ingestor():
             filename_pattern (str): O padrão para os nomes dos arquivos HTML salvos.
             all (bool, opcional): Um booleano indicando se todas as páginas disponíveis devem ser ingeridas (padrão é True).
             pages (int, opcional): O número máximo de páginas a serem ingeridas (padrão é None).
+            max_stale_pages (int, opcional): Número de páginas consecutivas sem anúncios novos após o qual a paginação é interrompida (padrão é 3).
+                O portal volta a servir os mesmos anúncios nas páginas finais, então essas páginas não são gravadas.
+            datestr (str, opcional): A data da pasta da camada RAW onde as páginas serão gravadas (padrão é a data atual).
 
         Returns:
             None.
@@ -69,6 +99,9 @@ class Ingestor():
         if all and max_pages is not None:
             raise ValueError("Cannot set 'all' to True while also specifying 'max_pages'")
 
+        # Fixa a data da execução para que todas as páginas fiquem na mesma pasta
+        datestr = datestr or str(datetime.now().date())
+
         # Guarda o webdriver da classe em uma variável
         driver = self.webdriver
 
@@ -88,6 +121,14 @@ class Ingestor():
         # Inicia o contador de página inicial
         page = 1
 
+        # Inicia os contadores de anúncios vistos na execução
+        self.seen_ids = set()
+        self.stats = dict(pages=0, stored_pages=0, empty_pages=0, reloads=0, listings=0, new_listings=0, duplicate_ratio=0.0)
+        stale_pages = 0
+
+        # Última página cujos anúncios foram contabilizados, para não contar recarregamentos da mesma página
+        counted_page = None
+
         # Realiza um loop até não haver mais páginas disponíveis ou chegar ao máximo definido em max_pages
         while all or (max_pages is not None and page <= max_pages):
             try:
@@ -97,15 +138,43 @@ class Ingestor():
                 # Obtém o HTML da página
                 html_content = driver.page_source
 
-                # Codifica em bytes usando o BytesIO
-                file_obj = io.BytesIO(html_content.encode())
-
-                # Configura o caminho do local onde o arquivo será armazenado no s3
-                file_path = f'pipeline/raw/{self.type.lower()}/{self.city}/{datetime.now().date()}/{filename_pattern}-{page}.html'
-
-                # Upload do arquivo no s3
-                self.s3.upload_fileobj(file_obj, self.bucket, file_path) # warning: esta variável deve ser substituída para receber da classe ou da invocação da função
-                logger.info(f"Page {page} ingested and saved to {file_path}")
+                # Configura o caminho do local onde o arquivo será armazenado na camada RAW
+                file_path = self.paths.raw_page(datestr=datestr, filename_pattern=filename_pattern, page=page)
+
+                # Compara os ids da página com os já vistos na execução
+                page_ids = self.parse_listing_ids(html_content)
+
+                if page == counted_page:
+                    # A página não avançou (ex: recarregada após erro), seus anúncios já foram contabilizados
+                    self.stats['reloads'] += 1
+                    logger.info(f"Page {page} reloaded ({self.stats['reloads']} reloads in this run)")
+                elif not page_ids:
+                    # Nenhum card encontrado: falha de renderização, captcha ou mudança no html do portal.
+                    # A página é gravada para inspeção e não conta como página sem anúncios novos.
+                    self.storage.write_bytes(file_path, html_content.encode())
+                    self.stats['empty_pages'] += 1
+                    logger.warning(f"Page {page} has no listing cards, saved to {file_path} for inspection")
+                else:
+                    counted_page = page
+                    new_ids = page_ids - self.seen_ids
+                    self.seen_ids |= new_ids
+                    self.stats['pages'] += 1
+                    self.stats['listings'] += len(page_ids)
+                    self.stats['new_listings'] += len(new_ids)
+
+                    if new_ids:
+                        stale_pages = 0
+
+                        # Grava o arquivo no armazenamento configurado (S3 ou disco local)
+                        self.storage.write_bytes(file_path, html_content.encode())
+                        self.stats['stored_pages'] += 1
+                        logger.info(f"Page {page} ingested and saved to {file_path} ({len(new_ids)} new listings)")
+                    else:
+                        stale_pages += 1
+                        logger.info(f"Page {page} skipped, no new listings ({stale_pages} consecutive)")
+                        if max_stale_pages and stale_pages >= max_stale_pages:
+                            logger.info(f"Stopping pagination after {stale_pages} pages without new listings")
+                            break
 
                 # Move a janela até o rodapé
                 driver.execute_script("window.scrollTo(0,9000)")
@@ -127,5 +196,11 @@ class Ingestor():
             except ValueError as e:
                 # implementar esse catch pros casos onde o driver já tenha percorrido todas as páginas.
                 pass
+
+        if self.stats['listings']:
+            self.stats['duplicate_ratio'] = 1 - self.stats['new_listings'] / self.stats['listings']
+        logger.info(f"{self.stats['new_listings']} unique listings in {self.stats['pages']} pages, "
+                    f"{self.stats['stored_pages']} stored, {self.stats['empty_pages']} without listings, "
+                    f"{self.stats['reloads']} reloads, duplicate ratio {self.stats['duplicate_ratio']:.1%}")
         return True
 
@@ -0,0 +1,257 @@
+# Builtins
+from datetime import datetime
+import argparse
+import logging
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+# As bibliotecas pesadas (selenium, boto3, bs4, pandas, pyarrow) são importadas apenas dentro
+# da etapa que as utiliza, para que rotinas curtas (ex: somente aggregate) iniciem rapidamente.
+
+logger = logging.getLogger(__name__)
+logger.setLevel(logging.INFO)
+formatter = logging.Formatter('%(asctime)s - %(levelname)s - %(message)s')
+
+# Add a console handler
+console_handler = logging.StreamHandler()
+console_handler.setLevel(logging.INFO)
+console_handler.setFormatter(formatter)
+logger.addHandler(console_handler)
+
+# Etapas do pipeline, na ordem em que são executadas pelo run-all.
+STAGES = ('ingest', 'extract', 'format', 'aggregate')
+COMMANDS = STAGES + ('run-all',)
+
+
+def load_stage(stage: str):
+    """
+    Importa e retorna a classe utilizada por uma etapa do pipeline.
+
+    As etapas importam suas dependências apenas por esta função, de modo que a medição de
+    cold start (startup-time) carrega exatamente os mesmos módulos que a execução real.
+    """
+    if stage == 'ingest':
+        from ingestors import Ingestor
+        return Ingestor
+    if stage == 'extract':
+        from extractors import Extractor
+        return Extractor
+    if stage == 'format':
+        from formatters import Formatter
+        return Formatter
+    if stage == 'aggregate':
+        from aggregators import Aggregator
+        return Aggregator
+    raise ValueError(f"Stage must be one of {', '.join(STAGES)}")
+
+
+def get_storage(storage: str = 's3', root: str = None, bucket: str = None, s3=None):
+    """
+    Cria o armazenamento utilizado pelas etapas do pipeline.
+
+    Args:
+        storage: 's3' para o Amazon S3 ou 'local' para o sistema de arquivos local.
+        root: O diretório raiz utilizado pelo armazenamento local.
+        bucket: O bucket do S3 (padrão: variável de ambiente S3_BUCKET).
+        s3: Opcional, um cliente boto3 já instanciado. Se omitido, é criado a partir das variáveis de ambiente.
+
+    Retorna:
+        Um objeto S3Storage ou LocalStorage.
+    """
+    from storage import LocalStorage, S3Storage
+
+    if storage == 'local':
+        return LocalStorage(root=root or 'data/local')
+    if storage != 's3':
+        raise ValueError("Storage must be one of 's3', 'local'")
+    bucket = bucket or os.environ.get('S3_BUCKET')
+    if not bucket:
+        raise ValueError("An S3 bucket must be given through 'bucket', '--bucket' or the S3_BUCKET environment variable")
+    if s3 is None:
+        import boto3
+        s3 = boto3.client('s3')
+    return S3Storage(s3=s3, bucket=bucket)
+
+
+def get_driver():
+    """
+    Cria um webdriver do Chrome em modo headless com as mesmas opções utilizadas no notebook do Kaggle.
+    """
+    from selenium import webdriver
+
+    options = webdriver.ChromeOptions()
+    options.add_argument('--headless')
+    options.add_argument('--no-sandbox')
+    options.add_argument('--disable-dev-shm-usage')
+    options.add_argument('user-agent=Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/90.0.4430.93 Safari/537.36')
+    options.add_argument("--window-size=1920,1080")
+    return webdriver.Chrome(options=options)
+
+
+def ingest(s3=None, driver=None, all: bool = True, max_pages: int = None, delay_seconds: int = 0, max_stale_pages: int = 3, storage=None, bucket: str = None, cidade: str = 'florianopolis', estado: str = 'santa-catarina', date: str = None):
+    """
+    Etapa de ingestão: salva as páginas html do portal na camada RAW.
+    """
+    Ingestor = load_stage('ingest')
+
+    storage = storage or get_storage(bucket=bucket, s3=s3)
+
+    # Encerra o navegador ao final apenas se ele foi criado por esta etapa
+    owns_driver = driver is None
+    driver = driver or get_driver()
+    try:
+        ingestor = Ingestor(cidade=cidade, estado=estado, webdriver=driver, storage=storage)
+        return ingestor.ingest_pages(filename_pattern='page', all=all, max_pages=max_pages, delay_seconds=delay_seconds, max_stale_pages=max_stale_pages, datestr=date)
+    finally:
+        if owns_driver:
+            driver.quit()
+
+
+def extract(date: str, s3=None, storage=None, bucket: str = None, cidade: str = 'florianopolis', max_pages: int = None):
+    """
+    Etapa de extração: lê as páginas html de uma data e grava os anúncios na camada PROCESSED.
+    """
+    Extractor = load_stage('extract')
+
+    storage = storage or get_storage(bucket=bucket, s3=s3)
+    extractor = Extractor(cidade=cidade, storage=storage)
+    extractor.process_folder(datestr=date, filename_pattern='processed', output_format='parquet', max_pages=max_pages)
+
+
+def format_listings(date: str, s3=None, storage=None, bucket: str = None):
+    """
+    Etapa de formatação: trata os anúncios extraídos de uma data e grava na camada FORMATTED.
+    """
+    Formatter = load_stage('format')
+
+    storage = storage or get_storage(bucket=bucket, s3=s3)
+    Formatter(storage=storage).run(datestr=date)
+
+
+def aggregate(s3=None, storage=None, bucket: str = None):
+    """
+    Etapa de agregação: consolida os arquivos formatados no histórico da camada CURATED.
+    """
+    Aggregator = load_stage('aggregate')
+
+    storage = storage or get_storage(bucket=bucket, s3=s3)
+    return Aggregator(storage=storage).run()
+
+
+def run_all(s3=None, driver=None, storage=None, bucket: str = None, max_pages: int = None, delay_seconds: int = 0, max_stale_pages: int = 3):
+    """
+    Executa todas as etapas do pipeline em sequência para a data atual.
+
+    A ingestão sempre obtém os anúncios ativos no momento, por isso a data é fixada uma única vez
+    e repassada a todas as etapas.
+    """
+    date = str(datetime.now().date())
+    storage = storage or get_storage(bucket=bucket, s3=s3)
+    ingest(driver=driver, all=max_pages is None, max_pages=max_pages, delay_seconds=delay_seconds, max_stale_pages=max_stale_pages, storage=storage, date=date)
+    extract(date=date, storage=storage)
+    format_listings(date=date, storage=storage)
+    aggregate(storage=storage)
+
+
+def measure_startup(stages: list = None, repeat: int = 5, storage: str = 's3', root: str = None, bucket: str = None) -> dict:
+    """
+    Mede o tempo de cold start de cada etapa do pipeline.
+
+    Cada medição executa este script em um novo interpretador com a opção --startup-only, que percorre
+    o mesmo caminho da execução real (criação do armazenamento e importação das dependências da etapa)
+    e encerra antes de iniciar o processamento.
+
+    Args:
+        stages: As etapas a serem medidas, todas por padrão.
+        repeat: O número de execuções por etapa.
+        storage: O armazenamento utilizado nas medições ('s3' ou 'local').
+        root: O diretório raiz do armazenamento local.
+        bucket: O bucket do S3.
+
+    Retorna:
+        Um dicionário com a mediana em segundos de cada etapa, incluindo o interpretador vazio em 'python'.
+    """
+    script = os.path.abspath(__file__)
+    options = ['--storage', storage, '--startup-only']
+    if root:
+        options += ['--root', root]
+    if bucket:
+        options += ['--bucket', bucket]
+    commands = {'python': [sys.executable, '-c', 'pass']}
+    commands |= {stage: [sys.executable, script, *options, stage] for stage in stages or COMMANDS}
+    results = {}
+    for stage, command in commands.items():
+        timings = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            subprocess.run(command, check=True)
+            timings.append(time.perf_counter() - start)
+        results[stage] = statistics.median(timings)
+        logger.info(f'{stage} ({storage}): {results[stage] * 1000:.0f} ms')
+    return results
+
+
+def parse_args(argv: list = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description='Pipeline de monitoramento de preços de aluguel.')
+    parser.add_argument('--storage', choices=['s3', 'local'], default='s3')
+    parser.add_argument('--root', default='data/local', help='Diretório raiz do armazenamento local.')
+    parser.add_argument('--bucket', help='Bucket do S3 (padrão: variável S3_BUCKET).')
+    parser.add_argument('--startup-only', action='store_true', help='Cria o armazenamento e importa as dependências da etapa, sem executá-la.')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    for command in ('ingest', 'run-all'):
+        command_parser = subparsers.add_parser(command)
+        command_parser.add_argument('--max-pages', type=int)
+        command_parser.add_argument('--delay-seconds', type=int, default=0)
+        command_parser.add_argument('--max-stale-pages', type=int, default=3, help='Páginas consecutivas sem anúncios novos antes de interromper a paginação (0 desativa).')
+
+    for command in ('extract', 'format'):
+        command_parser = subparsers.add_parser(command)
+        command_parser.add_argument('--date', default=str(datetime.now().date()))
+        if command == 'extract':
+            command_parser.add_argument('--max-pages', type=int)
+
+    subparsers.add_parser('aggregate')
+
+    startup_parser = subparsers.add_parser('startup-time')
+    startup_parser.add_argument('--repeat', type=int, default=5)
+    startup_parser.add_argument('stages', nargs='*', help=f'Etapas a serem medidas: {", ".join(COMMANDS)}.')
+
+    args = parser.parse_args(argv)
+    if args.command == 'startup-time' and not set(args.stages) <= set(COMMANDS):
+        parser.error(f'stages must be among: {", ".join(COMMANDS)}')
+    return args
+
+
+def main(argv: list = None) -> None:
+    args = parse_args(argv)
+
+    # Cria o armazenamento antes de qualquer etapa, validando as opções (ex: bucket do S3) também para o startup-time
+    storage = get_storage(storage=args.storage, root=args.root, bucket=args.bucket)
+
+    if args.command == 'startup-time':
+        measure_startup(stages=args.stages, repeat=args.repeat, storage=args.storage, root=args.root, bucket=args.bucket)
+        return
+
+    if args.startup_only:
+        for stage in STAGES if args.command == 'run-all' else [args.command]:
+            load_stage(stage)
+        return
+
+    if args.command == 'ingest':
+        ingest(all=args.max_pages is None, max_pages=args.max_pages, delay_seconds=args.delay_seconds, max_stale_pages=args.max_stale_pages, storage=storage)
+    elif args.command == 'extract':
+        extract(date=args.date, storage=storage, max_pages=args.max_pages)
+    elif args.command == 'format':
+        format_listings(date=args.date, storage=storage)
+    elif args.command == 'aggregate':
+        aggregate(storage=storage)
+    elif args.command == 'run-all':
+        run_all(storage=storage, max_pages=args.max_pages, delay_seconds=args.delay_seconds, max_stale_pages=args.max_stale_pages)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,262 @@
+# Builtins
+from abc import ABC, abstractmethod
+import contextlib
+import io
+import os
+import tempfile
+import logging
+
+# O pyarrow é importado apenas nos métodos que o utilizam, para que a etapa de ingestão,
+# que só grava html, não carregue as dependências de leitura e escrita de parquet.
+
+logger = logging.getLogger(__name__)
+logger.setLevel(logging.INFO)
+formatter = logging.Formatter('%(asctime)s - %(levelname)s - %(message)s')
+
+# Add a console handler
+console_handler = logging.StreamHandler()
+console_handler.setLevel(logging.INFO)
+console_handler.setFormatter(formatter)
+logger.addHandler(console_handler)
+
+
+class PipelinePaths():
+
+    def __init__(self, fonte:str = 'vivareal', cidade:str = 'florianopolis', root:str = 'pipeline') -> None:
+        """
+        Centraliza o layout de caminhos das camadas do pipeline (raw, processed, formatted e curated).
+
+        Args:
+            fonte: O nome do portal de origem dos anúncios.
+            cidade: A cidade monitorada.
+            root: O prefixo raiz de todos os caminhos do pipeline.
+        """
+        self.source = fonte.lower()
+        self.city = cidade
+        self.root = root
+
+    def raw_folder(self, datestr:str) -> str:
+        """
+        Retorna o prefixo da camada RAW onde ficam as páginas html de uma data.
+        """
+        return f'{self.root}/raw/{self.source}/{self.city}/{datestr}/'
+
+    def raw_page(self, datestr:str, filename_pattern:str, page:int) -> str:
+        """
+        Retorna o caminho de uma página html ingerida na camada RAW.
+        """
+        return f'{self.raw_folder(datestr)}{filename_pattern}-{page}.html'
+
+    def processed_folder(self) -> str:
+        """
+        Retorna o prefixo da camada PROCESSED, onde ficam os anúncios extraídos do html.
+        """
+        return f'{self.root}/processed/{self.source}/{self.city}/extracted/'
+
+    def processed_file(self, datestr:str, filename_pattern:str = 'processed', output_format:str = 'parquet') -> str:
+        """
+        Retorna o caminho do arquivo de anúncios extraídos de uma data.
+        """
+        return f'{self.processed_folder()}{filename_pattern}-{datestr}.{output_format}'
+
+    def formatted_folder(self) -> str:
+        """
+        Retorna o prefixo da camada FORMATTED, onde ficam os anúncios tratados.
+        """
+        return f'{self.root}/processed/{self.source}/{self.city}/formatted/'
+
+    def formatted_file(self, datestr:str) -> str:
+        """
+        Retorna o caminho do arquivo de anúncios tratados de uma data.
+        """
+        return f'{self.formatted_folder()}formatted-{datestr}.parquet'
+
+    def curated_file(self) -> str:
+        """
+        Retorna o caminho do histórico consolidado na camada CURATED.
+        """
+        return f'{self.root}/processed/{self.source}/{self.city.lower()}/curated/listings_history.parquet'
+
+
+class Storage(ABC):
+    """
+    Interface de armazenamento utilizada pelas etapas do pipeline.
+
+    As implementações trabalham sempre com chaves relativas (ex: 'pipeline/raw/...'),
+    de modo que as classes Ingestor, Extractor, Formatter e Aggregator não precisam
+    saber se os arquivos estão no S3 ou no disco local.
+    """
+
+    @abstractmethod
+    def list_keys(self, prefix:str) -> list:
+        pass
+
+    @abstractmethod
+    def read_bytes(self, key:str) -> bytes:
+        pass
+
+    @abstractmethod
+    def read_range(self, key:str, start:int, length:int) -> bytes:
+        pass
+
+    @abstractmethod
+    def write_bytes(self, key:str, data:bytes) -> None:
+        pass
+
+    @abstractmethod
+    def write_fileobj(self, file_obj, key:str) -> None:
+        pass
+
+    @abstractmethod
+    def open_input(self, key:str) -> 'pa.NativeFile':
+        pass
+
+    @abstractmethod
+    def open_output(self, key:str):
+        """
+        Context manager que retorna um arquivo para escrita incremental, gravado na chave ao sair do bloco sem erros.
+        """
+
+    def read_text(self, key:str, encoding:str = 'utf-8') -> str:
+        return self.read_bytes(key).decode(encoding)
+
+    def read_parquet(self, key:str) -> 'pa.Table':
+        """
+        Lê um arquivo parquet e retorna uma tabela pyarrow.
+        """
+        import pyarrow.parquet as pq
+        return pq.read_table(self.open_input(key))
+
+    def write_parquet(self, table:'pa.Table', key:str) -> None:
+        """
+        Serializa uma tabela pyarrow em parquet e grava no caminho informado.
+        """
+        import pyarrow.parquet as pq
+        output_buffer = io.BytesIO()
+        pq.write_table(table, output_buffer)
+        output_buffer.seek(0)
+        self.write_fileobj(output_buffer, key)
+
+
+class S3Storage(Storage):
+
+    def __init__(self, s3, bucket:str) -> None:
+        """
+        Armazenamento no Amazon S3.
+
+        Args:
+            s3: Um cliente boto3 do S3.
+            bucket: O nome do bucket onde os arquivos do pipeline são armazenados.
+        """
+        self.s3 = s3
+        self.bucket = bucket
+
+    def list_keys(self, prefix:str) -> list:
+        keys = []
+        paginator = self.s3.get_paginator('list_objects_v2')
+        for page in paginator.paginate(Bucket=self.bucket, Prefix=prefix):
+            keys.extend(obj['Key'] for obj in page.get('Contents', []))
+        return keys
+
+    def read_bytes(self, key:str) -> bytes:
+        response = self.s3.get_object(Bucket=self.bucket, Key=key)
+        return response['Body'].read()
+
+    def read_range(self, key:str, start:int, length:int) -> bytes:
+        response = self.s3.get_object(Bucket=self.bucket, Key=key, Range=f'bytes={start}-{start + length - 1}')
+        return response['Body'].read()
+
+    def write_bytes(self, key:str, data:bytes) -> None:
+        self.write_fileobj(io.BytesIO(data), key)
+
+    def write_fileobj(self, file_obj, key:str) -> None:
+        self.s3.upload_fileobj(file_obj, self.bucket, key)
+
+    def open_input(self, key:str) -> 'pa.NativeFile':
+        import pyarrow as pa
+        return pa.BufferReader(self.read_bytes(key))
+
+    @contextlib.contextmanager
+    def open_output(self, key:str):
+        # O conteúdo é escrito em um arquivo temporário em disco e enviado em partes pelo upload_fileobj
+        with tempfile.TemporaryFile() as f:
+            yield f
+            f.seek(0)
+            self.write_fileobj(f, key)
+
+
+class LocalStorage(Storage):
+
+    def __init__(self, root:str) -> None:
+        """
+        Armazenamento no sistema de arquivos local, espelhando o layout de chaves do S3.
+
+        Os arquivos parquet são lidos com pa.memory_map, sem cópias intermediárias em memória,
+        o que permite rodar e medir as etapas do pipeline de ponta a ponta em disco local.
+
+        Args:
+            root: O diretório raiz onde as chaves do pipeline serão gravadas.
+        """
+        self.root = root
+
+    def path(self, key:str) -> str:
+        return os.path.join(self.root, *key.split('/'))
+
+    def list_keys(self, prefix:str) -> list:
+        # Percorre apenas o diretório do prefixo, e não todo o root, para não listar as demais datas e camadas
+        keys = []
+        for dirpath, _, filenames in os.walk(os.path.dirname(self.path(prefix))):
+            for filename in filenames:
+                key = os.path.relpath(os.path.join(dirpath, filename), self.root).replace(os.sep, '/')
+                if key.startswith(prefix):
+                    keys.append(key)
+        return sorted(keys)
+
+    def read_bytes(self, key:str) -> bytes:
+        with open(self.path(key), 'rb') as f:
+            return f.read()
+
+    def read_range(self, key:str, start:int, length:int) -> bytes:
+        import pyarrow as pa
+        with pa.memory_map(self.path(key), 'r') as source:
+            source.seek(start)
+            return source.read(length)
+
+    def write_bytes(self, key:str, data:bytes) -> None:
+        self.write_fileobj(io.BytesIO(data), key)
+
+    def write_fileobj(self, file_obj, key:str) -> None:
+        path = self.path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'wb') as f:
+            while chunk := file_obj.read(1024 * 1024):
+                f.write(chunk)
+
+    def open_input(self, key:str) -> 'pa.NativeFile':
+        import pyarrow as pa
+        return pa.memory_map(self.path(key), 'r')
+
+    @contextlib.contextmanager
+    def open_output(self, key:str):
+        # O conteúdo é escrito em um arquivo temporário no mesmo diretório e só substitui o destino se o bloco terminar sem erros
+        path = self.path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f'{path}.tmp-{os.getpid()}'
+        try:
+            with open(tmp_path, 'wb') as f:
+                yield f
+            os.replace(tmp_path, path)
+        finally:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+
+    def read_parquet(self, key:str) -> 'pa.Table':
+        import pyarrow.parquet as pq
+        with self.open_input(key) as source:
+            return pq.read_table(source)
+
+    def write_parquet(self, table:'pa.Table', key:str) -> None:
+        import pyarrow.parquet as pq
+        path = self.path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        pq.write_table(table, path)
@@ -2,12 +2,6 @@ import pandas as pd
 import requests
 import base64
 import logging
-from io import BytesIO
-    
-import boto3
-import pyarrow as pa
-import pyarrow.parquet as pq
-
 
 logger = logging.getLogger(__name__)
 logger.setLevel(logging.INFO)
@@ -20,31 +14,6 @@ console_handler.setFormatter(formatter)
 logger.addHandler(console_handler)
 
 
-class ResultSet(pd.DataFrame):
-    def __init__(self):
-        super().__init__(
-            data={
-                'data': pd.Series(dtype='datetime64[ns]'),
-                'fonte': pd.Series(dtype='str'),
-                'id': pd.Series(dtype='int64'),
-                'descricao': pd.Series(dtype='str'),
-                'tipo': pd.Series(dtype='str'),
-                'endereco': pd.Series(dtype='str'),
-                'rua': pd.Series(dtype='str'),
-                'numero': pd.Series(dtype='int'),
-                'bairro': pd.Series(dtype='str'),
-                'cidade': pd.Series(dtype='str'),
-                'valor': pd.Series(dtype='float'),
-                'periodicidade': pd.Series(dtype='str'),
-                'condominio': pd.Series(dtype='float'),
-                'area': pd.Series(dtype='float'),
-                'qtd_banheiros': pd.Series(dtype='int'),
-                'qtd_quartos': pd.Series(dtype='int'),
-                'qtd_vagas': pd.Series(dtype='int'),
-                'url': pd.Series(dtype='str'),
-                'amenities': pd.Series(dtype='str')
-                    })
-
 class GithubApi():
     def __init__(self, token:str, owner:str, repo:str, branch:str) -> None:
         """
@@ -207,43 +176,3 @@ class GithubApi():
                 "sha": current_sha,
                 "branch":self.branch}
         self._put_content(headers=headers, data=data, url=file_url)
-        
-class Aggregator():
-    def __init__(self, s3):
-        self.s3 = s3
-        self.city = 'florianopolis'
-        self.type = 'vivareal'
-
-    def combine_parquet_files(self, bucket_name, prefix):
-        s3 = self.s3
-        response = s3.list_objects_v2(Bucket=bucket_name, Prefix=prefix)
-
-        tables = []
-        for obj in response['Contents']:
-            if obj['Key'].endswith('.parquet'):
-                file_obj = s3.get_object(Bucket=bucket_name, Key=obj['Key'])
-                data = file_obj['Body'].read()
-                buffer = BytesIO(data)
-                table = pq.read_table(buffer)
-                tables.append(table)
-        return pa.concat_tables(tables)
-
-    def upload_combined_file(self, bucket_name, combined_table, s3_key):
-        s3 = self.s3
-        output_buffer = BytesIO()
-        pq.write_table(combined_table, output_buffer)
-        output_buffer.seek(0)
-        self.s3.upload_fileobj(output_buffer, bucket_name, s3_key)
-
-    def run(self, bucket_name, export_method:str='s3'):
-        output_filename = f'pipeline/processed/{self.type.lower()}/{self.city.lower()}/curated/listings_history.parquet'
-        prefix = f'pipeline/processed/{self.type.lower()}/{self.city}/formatted/'
-        combined_table = self.combine_parquet_files(bucket_name, prefix)
-        if export_method == 's3':
-            self.upload_combined_file(bucket_name, combined_table, s3_key=output_filename)
-            return True
-        
-        elif export_method == 'df':
-            return combined_table.to_pandas()
-        else:
-            raise TypeError('Invalid export method, must be one of "s3", "df"')
\ No newline at end of file